@@ -20,12 +20,20 @@ It now includes:
 import os
 import sys
 import datetime
+import hashlib
+import heapq
 import json
 import time
-import requests
-import gspread
-import math
-from google.oauth2.service_account import Credentials
+import queue
+import random
+import sqlite3
+import threading
+import httpx
+import orjson
+from collections import deque
+from dataclasses import dataclass, field, replace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tenacity import retry, retry_if_exception_type, stop_after_attempt
 
 # --- PATH FINDER FUNCTION ---
 def find_file_path(filename):
@@ -39,14 +47,60 @@ def find_file_path(filename):
         base_path = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_path, filename)
 
+def find_data_path(filename):
+    """
+    Finds the path to a file the script writes, next to the script or the
+    executable itself. A PyInstaller one-file executable unpacks to a temporary
+    folder that is deleted on exit, so files kept between runs can't live there.
+    """
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, filename)
+
 # --- CONFIGURATION (Edit These Only) ---
 # The spreadsheet ID is now part of the script itself, not a credential.
 SPREADSHEET_ID = "1VcliY4xbM7yNHMRpOtj5b1YQJ6gueudpetdcZfDx7sM"
 CONTROL_SHEET_NAME = "Control_Sheet"
 
-# AI Evaluation Settings (These can be overridden by the Control Sheet)
-BATCH_SIZE = 20
+# AI Evaluation Settings (Batch Size and Top Leads Per Batch can be overridden by the Control Sheet)
+BATCH_SIZE = 100
 FILTER_HIGH_ONLY = True
+TOP_LEADS_PER_BATCH = 50
+GEMINI_TEMPERATURE = 0.2
+GEMINI_OUTPUT_TOKENS_PER_LEAD = 80
+
+# Concurrency Settings (Search Workers can be overridden by the Control Sheet)
+PROPERTY_MAX_WORKERS = 8
+SEARCH_MAX_WORKERS = 10
+REVIEW_MAX_WORKERS = 8
+GEMINI_MAX_WORKERS = 4
+
+# Per-minute request budgets for each API endpoint
+YELP_SEARCH_RPM = 300
+YELP_REVIEW_RPM = 300
+GEMINI_RPM = 10
+
+# Network Settings
+YELP_TIMEOUT_SECONDS = 10
+GEMINI_TIMEOUT_SECONDS = 60
+HTTP_CONNECT_RETRIES = 3
+
+# Retry Settings
+YELP_MAX_RETRIES = 3
+GEMINI_MAX_ATTEMPTS = 5
+MAX_BACKOFF_SECONDS = 60
+MAX_RETRY_AFTER_SECONDS = 300
+
+# Local Cache Settings (Yelp reviews and Gemini evaluations are reused for this many days)
+CACHE_DB_PATH = find_data_path(os.path.join(".cache", "tenant_hunter.db"))
+CACHE_TTL_DAYS = 7
+
+# Rule-based pre-filter: leads this clear-cut are rated without reviews or Gemini
+AUTO_HIGH_MIN_RATING = 4.5
+AUTO_HIGH_MIN_REVIEWS = 100
+AUTO_LOW_MAX_RATING = 3.5
 
 # New Review and Rating Filters
 REVIEW_FILTER_MIN_COUNT = 3
@@ -69,83 +123,342 @@ except KeyError as e:
     print(f"❌ config.json is missing a required key: {e}")
     exit()
 
+# --- HTTP CLIENTS ---
+# One shared HTTP/2 client per API keeps connections alive between calls and multiplexes
+# the worker threads' concurrent requests. Failed connection attempts are retried by the
+# transport; rate-limit and server-error responses are retried by the callers.
+def build_http_client(timeout, headers=None):
+    """Creates a pooled HTTP/2 client with the given timeout and default headers."""
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=HTTP_CONNECT_RETRIES,
+        limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+    )
+    return httpx.Client(transport=transport, timeout=timeout, headers=headers)
+
+YELP_CLIENT = build_http_client(YELP_TIMEOUT_SECONDS, headers=YELP_HEADERS)
+GEMINI_CLIENT = build_http_client(GEMINI_TIMEOUT_SECONDS, headers={'Content-Type': 'application/json'})
+
+# --- RATE LIMITING ---
+class RateLimiter:
+    """
+    Sliding-window limiter shared by all threads calling one endpoint.
+    wait() only blocks once the per-minute budget has actually been used up.
+    """
+
+    def __init__(self, rpm, window=60.0):
+        self.rpm = rpm
+        self.window = window
+        self.timestamps = deque()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.timestamps and now - self.timestamps[0] >= self.window:
+                    self.timestamps.popleft()
+                if len(self.timestamps) < self.rpm:
+                    self.timestamps.append(now)
+                    return
+                delay = self.window - (now - self.timestamps[0])
+            time.sleep(delay)
+
+YELP_SEARCH_RL = RateLimiter(rpm=YELP_SEARCH_RPM)
+YELP_REVIEW_RL = RateLimiter(rpm=YELP_REVIEW_RPM)
+GEMINI_RL = RateLimiter(rpm=GEMINI_RPM)
+
+# --- ADAPTIVE CONCURRENCY ---
+class AIMDConcurrency:
+    """
+    Caps the number of in-flight requests to one API, TCP style: the limit grows
+    additively while responses are fast and clean, and is halved on 429s, 5xx
+    responses and connection failures. It is halved once per congestion event:
+    failures of requests that were already in flight at the last cut are ignored.
+    """
+
+    def __init__(self, cmin=2, cmax=16, lmax=5.0):
+        self.cmin = cmin
+        self.cmax = cmax
+        self.lmax = lmax
+        self.c = float(cmin)
+        self.in_flight = 0
+        self.last_decrease = float('-inf')
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= int(self.c):
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def on_success(self, latency):
+        with self.cond:
+            if latency <= self.lmax:
+                self.c = min(self.cmax, self.c + 0.5)
+                self.cond.notify_all()
+
+    def on_error(self, start):
+        with self.cond:
+            if start < self.last_decrease:
+                return
+            self.c = max(self.cmin, self.c * 0.5)
+            self.last_decrease = time.monotonic()
+
+YELP_CONCURRENCY = AIMDConcurrency(cmin=2, cmax=16, lmax=5.0)
+GEMINI_CONCURRENCY = AIMDConcurrency(cmin=1, cmax=8, lmax=60.0)
+
+def send_request(client, method, url, limiter, concurrency, **kwargs):
+    """
+    Sends a request through a shared client, waiting on the endpoint's rate limiter
+    and concurrency controller first, and reports the outcome back to the controller.
+    """
+    limiter.wait()
+    concurrency.acquire()
+    start = time.monotonic()
+    try:
+        response = client.request(method, url, **kwargs)
+    except httpx.TransportError:
+        concurrency.on_error(start)
+        raise
+    finally:
+        concurrency.release()
+    if response.status_code == 429 or response.status_code >= 500:
+        concurrency.on_error(start)
+    else:
+        concurrency.on_success(time.monotonic() - start)
+    return response
+
+def requested_wait(response):
+    """
+    Returns how long the server asked us to wait before retrying, from its Retry-After
+    or rate-limit reset headers, or None if it didn't say.
+    """
+    headers = response.headers if response is not None else {}
+    delay = None
+    try:
+        if 'Retry-After' in headers:
+            delay = float(headers['Retry-After'])
+        elif headers.get('X-RateLimit-Remaining') is not None and int(headers['X-RateLimit-Remaining']) == 0 and 'X-RateLimit-Reset' in headers:
+            reset = float(headers['X-RateLimit-Reset'])
+            # The reset header is either an epoch timestamp or a number of seconds
+            delay = reset - time.time() if reset > 1e9 else reset
+    except ValueError:
+        delay = None
+    if delay is None or delay < 0:
+        return None
+    return delay
+
+def retry_after_too_long(response):
+    """
+    Returns True if the server asked us to wait longer than MAX_RETRY_AFTER_SECONDS
+    (for example until a daily quota resets), in which case the request is given up.
+    """
+    delay = requested_wait(response)
+    if delay is None or delay <= MAX_RETRY_AFTER_SECONDS:
+        return False
+    print(f"⚠️ The server asked to wait {delay:.0f}s before retrying, which is longer than {MAX_RETRY_AFTER_SECONDS}s. Giving up on this request.")
+    return True
+
+def backoff_delay(response, attempt):
+    """
+    Returns how long to wait before retrying a failed request.
+    Honors the server's Retry-After or rate-limit reset headers when present, up to
+    MAX_RETRY_AFTER_SECONDS, since retrying any sooner would only be rate-limited again;
+    otherwise falls back to exponential backoff with jitter, capped at MAX_BACKOFF_SECONDS.
+    """
+    delay = requested_wait(response)
+    if delay is None:
+        return min(MAX_BACKOFF_SECONDS, 2 ** attempt + random.uniform(0, 1))
+    return min(delay, MAX_RETRY_AFTER_SECONDS)
+
+def backoff_sleep(response, attempt):
+    """
+    Sleeps for the backoff_delay of a failed request. Returns False without sleeping
+    if the server's requested wait is too long to retry at all.
+    """
+    if retry_after_too_long(response):
+        return False
+    time.sleep(backoff_delay(response, attempt))
+    return True
+
 # --- HELPER FUNCTIONS ---
 
-def get_sheet_connection():
-    """Establishes and returns a connection to the Google Sheet using credentials from a local file."""
+def get_control_int(control_dict, key, default):
+    """Reads a positive integer setting from a control sheet row, falling back to the default."""
+    value = control_dict.get(key, "").strip()
     try:
+        parsed = int(value)
+    except ValueError:
+        return default
+    return parsed if parsed > 0 else default
+
+# The Google libraries are imported, and the service account loaded, on first use only.
+# The authorized client and spreadsheet handle are then shared by every sheet operation.
+_CREDS = None
+_GC = None
+_SH = None
+_SH_LOCK = threading.Lock()
+# Properties finish concurrently, so their sheet writes are serialized on the shared client
+_SHEET_WRITE_LOCK = threading.Lock()
+
+def get_sheet_client():
+    """Loads the service account credentials and authorizes a gspread client once per process."""
+    global _CREDS, _GC
+    if _GC is None:
+        import gspread
+        from google.oauth2.service_account import Credentials
         scope = ['https://www.googleapis.com/auth/spreadsheets']
         creds_path = find_file_path('service_account.json')
-        creds = Credentials.from_service_account_file(creds_path, scopes=scope)
-        gc = gspread.authorize(creds)
-        sh = gc.open_by_key(SPREADSHEET_ID)
-        return sh
-    except FileNotFoundError:
-        print("❌ Missing service_account.json file. Please place it in the same directory.")
-        return None
-    except Exception as e:
-        print(f"❌ Error connecting to Google Sheets: {e}")
-        return None
+        _CREDS = Credentials.from_service_account_file(creds_path, scopes=scope)
+        _GC = gspread.authorize(_CREDS)
+    return _GC
+
+def get_sheet_connection():
+    """
+    Returns a connection to the Google Sheet using credentials from a local file.
+    The connection is established on first use and cached for the rest of the run.
+    """
+    global _SH
+    with _SH_LOCK:
+        if _SH is not None:
+            return _SH
+        try:
+            _SH = get_sheet_client().open_by_key(SPREADSHEET_ID)
+            return _SH
+        except FileNotFoundError:
+            print("❌ Missing service_account.json file. Please place it in the same directory.")
+            return None
+        except Exception as e:
+            print(f"❌ Error connecting to Google Sheets: {e}")
+            return None
+
+def reset_sheet_connection():
+    """Drops the cached connection so the next sheet operation reconnects."""
+    global _SH
+    with _SH_LOCK:
+        _SH = None
 
 def read_from_sheet(sheet_name):
     """
     Reads data from the specified Google Sheet tab.
     Returns the worksheet as a list of lists.
+    The tab is read by name with a single values request, without a metadata lookup.
     """
+    import gspread
     sh = get_sheet_connection()
     if not sh:
         return None
     try:
-        worksheet = sh.worksheet(sheet_name)
-        return worksheet.get_all_values()
+        response = sh.values_batch_get([gspread.utils.absolute_range_name(sheet_name)])
+        values = response['valueRanges'][0].get('values', [])
+        # The API trims trailing empty cells, so pad rows to a rectangle like get_all_values
+        return gspread.utils.fill_gaps(values)
+    except gspread.exceptions.APIError as e:
+        print(f"❌ Error reading from Google Sheet '{sheet_name}': {e}")
+        reset_sheet_connection()
+        return None
     except Exception as e:
         print(f"❌ Error reading from Google Sheet '{sheet_name}': {e}")
         return None
 
-def write_to_sheet(sheet_name, header, data):
+def write_to_sheet(sheet_name, header, data, extra_updates=None):
     """
     Writes data to a new or existing sheet in the specified Google Sheet.
-    If the sheet exists, it appends the data. If it does not, it creates it.
+    If the sheet exists, its contents are replaced. If it does not, it creates it.
+    The header and data are written as raw values in one values batch update; any
+    extra range updates (e.g. the control sheet status) follow in a second one, entered
+    as if typed so that Sheets parses dates and numbers in them.
+    Returns True if the write succeeded.
     """
+    import gspread
     sh = get_sheet_connection()
     if not sh:
-        return
+        return False
+    values = ([header] if header else []) + (data or [])
     try:
-        try:
-            worksheet = sh.worksheet(sheet_name)
-            worksheet.clear()
-            if header:
-                worksheet.append_row(header)
-            if data:
-                worksheet.append_rows(data)
-            print(f"✅ Successfully wrote results to the '{sheet_name}' sheet.")
-        except gspread.exceptions.WorksheetNotFound:
-            worksheet = sh.add_worksheet(title=sheet_name, rows="1", cols="1")
-            if header:
-                worksheet.append_row(header)
-            if data:
-                worksheet.append_rows(data)
+        with _SHEET_WRITE_LOCK:
+            # Address the sheet by name through the values API instead of fetching the
+            # spreadsheet metadata to check whether it exists first
+            try:
+                sh.values_clear(gspread.utils.absolute_range_name(sheet_name))
+                created = False
+            except gspread.exceptions.APIError as e:
+                # A sheet name that does not exist cannot be parsed as a range
+                if e.response.status_code != 400:
+                    raise
+                # Size the new sheet up front so the write does not have to grow the grid
+                num_cols = max((len(row) for row in values), default=1)
+                sh.add_worksheet(title=sheet_name, rows=str(max(len(values), 1)), cols=str(num_cols))
+                created = True
+
+            if values:
+                sh.values_batch_update({
+                    'valueInputOption': 'RAW',
+                    'data': [{'range': gspread.utils.absolute_range_name(sheet_name, 'A1'), 'values': values}],
+                })
+            # USER_ENTERED stores the control sheet's run timestamp as a date-time, not text
+            if extra_updates:
+                sh.values_batch_update({'valueInputOption': 'USER_ENTERED', 'data': extra_updates})
+
+        if created:
             print(f"✅ Successfully created and wrote results to the new '{sheet_name}' sheet.")
+        else:
+            print(f"✅ Successfully wrote results to the '{sheet_name}' sheet.")
+        return True
+    except gspread.exceptions.APIError as e:
+        print(f"❌ Error writing to Google Sheet: {e}")
+        reset_sheet_connection()
     except Exception as e:
         print(f"❌ Error writing to Google Sheet: {e}")
+    return False
 
-def update_control_sheet_status(sheet_prefix):
-    """Updates the status and timestamp for a property in the control sheet."""
-    sh = get_sheet_connection()
-    if not sh:
-        return
+def control_status_update(row_index):
+    """
+    Builds the range update that marks a property row in the control sheet as completed
+    with the current timestamp (columns G and H), for use with write_to_sheet.
+    """
+    import gspread
+    return {
+        'range': gspread.utils.absolute_range_name(CONTROL_SHEET_NAME, f"G{row_index}:H{row_index}"),
+        'values': [["Completed", datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")]],
+    }
 
-    try:
-        control_sheet = sh.worksheet(CONTROL_SHEET_NAME)
-        cell = control_sheet.find(sheet_prefix)
-        if cell:
-            control_sheet.update_cell(cell.row, 7, "Completed")
-            control_sheet.update_cell(cell.row, 8, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-            print(f"✅ Successfully updated status for property with prefix '{sheet_prefix}'.")
-        else:
-            print(f"⚠️ Could not find property with prefix '{sheet_prefix}' in the control sheet.")
-    except Exception as e:
-        print(f"❌ Error updating control sheet: {e}")
+@dataclass(slots=True)
+class Lead:
+    """A business found on Yelp, with its Gemini or rule-based evaluation once rated."""
+    name: str
+    address: str
+    phone: str
+    business_id: str
+    rating: float
+    review_count: int
+    business_type: str
+    source: str
+    reviews: list = field(default_factory=list)
+    likelihood: str = 'Low'
+    score: int = 0
+    reasoning: str = ''
+
+def make_lead(business, term):
+    """Builds a lead from a Yelp search result found with the given search term."""
+    location = business.get('location') or {}
+    address_lines = location.get('display_address') or ['']
+    return Lead(
+        name=business.get('name'),
+        address=address_lines[0],
+        phone=business.get('phone'),
+        business_id=business.get('id'),
+        rating=business.get('rating', 0),
+        review_count=business.get('review_count', 0),
+        business_type=term,
+        source='Yelp API',
+    )
 
 def yelp_search_leads(term, city, limit=50, radius=40000):
     """
@@ -165,196 +478,594 @@ def yelp_search_leads(term, city, limit=50, radius=40000):
         }
 
         try:
-            response = requests.get(yelp_url, headers=YELP_HEADERS, params=params)
+            # Rate-limited pages are retried after the wait the server asks for
+            for attempt in range(YELP_MAX_RETRIES):
+                response = send_request(YELP_CLIENT, 'GET', yelp_url, YELP_SEARCH_RL, YELP_CONCURRENCY, params=params)
+                if response.status_code != 429 or attempt == YELP_MAX_RETRIES - 1:
+                    break
+                if not backoff_sleep(response, attempt):
+                    break
             response.raise_for_status()
-            businesses = response.json().get('businesses', [])
+            businesses = orjson.loads(response.content).get('businesses', [])
             
-            for business in businesses:
-                rating = business.get('rating', 0)
-                review_count = business.get('review_count', 0)
-
-                # NEW: Initial filter to skip low-quality leads
-                if review_count < REVIEW_FILTER_MIN_COUNT or rating < RATING_FILTER_MIN:
-                    continue
-
-                lead = {
-                    'name': business.get('name'),
-                    'address': business.get('location', {}).get('display_address', [''])[0],
-                    'phone': business.get('phone'),
-                    'business_id': business.get('id'),
-                    'rating': rating,
-                    'review_count': review_count,
-                    'business_type': term,
-                    'source': 'Yelp API',
-                    'reviews': []
-                }
-                all_leads.append(lead)
+            # NEW: Initial filter to skip low-quality leads
+            all_leads.extend(
+                make_lead(business, term) for business in businesses
+                if business.get('review_count', 0) >= REVIEW_FILTER_MIN_COUNT
+                and business.get('rating', 0) >= RATING_FILTER_MIN
+            )
             
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             print(f"❌ Yelp API request failed for '{term}': {e}")
             break
-        
-        time.sleep(1)
             
     return all_leads
 
+# --- LOCAL CACHE ---
+_CACHE_CONN = None
+_CACHE_LOCK = threading.Lock()
+
+def get_cache_connection():
+    """Opens the local SQLite cache on first use and returns the shared connection."""
+    global _CACHE_CONN
+    if _CACHE_CONN is None:
+        os.makedirs(os.path.dirname(CACHE_DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+        conn.execute("CREATE TABLE IF NOT EXISTS yelp_reviews (business_id TEXT PRIMARY KEY, fetched_at REAL, payload TEXT)")
+        # Evaluations cached before they were keyed by prompt version can't be trusted, so start over
+        eval_columns = [row[1] for row in conn.execute("PRAGMA table_info(eval_cache)")]
+        if eval_columns and 'prompt_version' not in eval_columns:
+            conn.execute("DROP TABLE eval_cache")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS eval_cache (business_id TEXT, suite_sizes TEXT, city TEXT, prompt_version TEXT, "
+            "score NUMERIC, likelihood TEXT, reasoning TEXT, ts REAL, PRIMARY KEY (business_id, suite_sizes, city, prompt_version))"
+        )
+        # Expired entries would never be served again, so drop them once per run
+        cutoff = time.time() - CACHE_TTL_DAYS * 86400
+        conn.execute("DELETE FROM yelp_reviews WHERE fetched_at < ?", (cutoff,))
+        conn.execute("DELETE FROM eval_cache WHERE ts < ?", (cutoff,))
+        conn.commit()
+        _CACHE_CONN = conn
+    return _CACHE_CONN
+
+def get_cached_reviews(business_id):
+    """Returns cached reviews for a business if they are younger than CACHE_TTL_DAYS, otherwise None."""
+    try:
+        with _CACHE_LOCK:
+            row = get_cache_connection().execute(
+                "SELECT payload, fetched_at FROM yelp_reviews WHERE business_id = ?", (business_id,)
+            ).fetchone()
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Could not read the review cache: {e}")
+        return None
+    if row and time.time() - row[1] < CACHE_TTL_DAYS * 86400:
+        return json.loads(row[0])
+    return None
+
+def cache_reviews(business_id, reviews):
+    """Stores freshly fetched reviews for a business in the local cache."""
+    try:
+        with _CACHE_LOCK:
+            conn = get_cache_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO yelp_reviews (business_id, fetched_at, payload) VALUES (?, ?, ?)",
+                (business_id, time.time(), json.dumps(reviews)),
+            )
+            conn.commit()
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Could not write to the review cache: {e}")
+
+def get_cached_evaluation(business_id, suite_sizes, city):
+    """
+    Returns a cached Gemini evaluation (likelihood, score, reasoning) of a business for the
+    same suite sizes, city and prompt version if it is younger than CACHE_TTL_DAYS,
+    otherwise None.
+    """
+    try:
+        with _CACHE_LOCK:
+            row = get_cache_connection().execute(
+                "SELECT likelihood, score, reasoning, ts FROM eval_cache "
+                "WHERE business_id = ? AND suite_sizes = ? AND city = ? AND prompt_version = ?",
+                (business_id, suite_sizes, city, GEMINI_PROMPT_VERSION),
+            ).fetchone()
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Could not read the evaluation cache: {e}")
+        return None
+    if row and time.time() - row[3] < CACHE_TTL_DAYS * 86400:
+        return {"likelihood": row[0], "score": row[1], "reasoning": row[2]}
+    return None
+
+def cache_evaluations(evaluated_leads, suite_sizes, city):
+    """Stores the Gemini evaluations of a batch of leads in the local cache, under the current prompt version."""
+    now = time.time()
+    rows = [
+        (lead.business_id, suite_sizes, city, GEMINI_PROMPT_VERSION, lead.score, lead.likelihood, lead.reasoning, now)
+        for lead in evaluated_leads if lead.business_id
+    ]
+    try:
+        with _CACHE_LOCK:
+            conn = get_cache_connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO eval_cache (business_id, suite_sizes, city, prompt_version, score, likelihood, reasoning, ts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Could not write to the evaluation cache: {e}")
+
 def get_yelp_reviews(business_id):
     """
     Fetches the top 3 reviews for a given business ID from the Yelp API.
-    Returns a list of review text strings.
+    Returns a list of review text strings, served from the local cache when fresh.
     """
+    cached = get_cached_reviews(business_id)
+    if cached is not None:
+        return cached
+
     reviews_url = f"https://api.yelp.com/v3/businesses/{business_id}/reviews"
     reviews = []
-    try:
-        response = requests.get(reviews_url, headers=YELP_HEADERS)
-        response.raise_for_status()
-        reviews_json = response.json().get('reviews', [])
-        for review in reviews_json:
-            reviews.append(review.get('text', ''))
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
-            pass
-        elif e.response.status_code == 429:
-            print(f"❌ Failed to fetch reviews for business ID {business_id}: 429 Client Error: Too Many Requests.")
-        else:
+    for attempt in range(YELP_MAX_RETRIES):
+        try:
+            response = send_request(YELP_CLIENT, 'GET', reviews_url, YELP_REVIEW_RL, YELP_CONCURRENCY)
+            response.raise_for_status()
+            reviews_json = orjson.loads(response.content).get('reviews', [])
+            for review in reviews_json:
+                reviews.append(review.get('text', ''))
+            cache_reviews(business_id, reviews)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429 and attempt < YELP_MAX_RETRIES - 1 and backoff_sleep(e.response, attempt):
+                continue
+            if e.response.status_code == 404:
+                pass
+            elif e.response.status_code == 429:
+                print(f"❌ Failed to fetch reviews for business ID {business_id}: 429 Client Error: Too Many Requests.")
+            else:
+                print(f"❌ Failed to fetch reviews for business ID {business_id}: {e}")
+        except (httpx.HTTPError, ValueError) as e:
             print(f"❌ Failed to fetch reviews for business ID {business_id}: {e}")
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Failed to fetch reviews for business ID {business_id}: {e}")
+        break
     
-    time.sleep(0.5)
     return reviews
 
 
-def ai_evaluate_batch(batch, suite_sizes, property_city):
+# --- GEMINI REQUEST TEMPLATE ---
+GEMINI_MODEL = "gemini-2.5-flash-preview-05-20"
+# Static parts of every Gemini request, built once and shared by all batches.
+GEMINI_PROMPT_PREAMBLE = (
+    "You are an expert commercial real estate analyst. "
+    "Your task is to evaluate a list of businesses to determine their likelihood of being a viable tenant "
+    "for a commercial property. Your final response must be a JSON array of objects, one per business, "
+    "in the same order as the input. "
+    "The objects should have the keys 'Likelihood' ('High', 'Medium', or 'Low'), 'Score' (1-100), and 'Reasoning' "
+    "(one sentence only).\n\n"
+    "The property for lease has suites available in the size range of {suite_sizes} in {city}.\n"
+    "Here are the businesses to evaluate, as JSON:\n"
+)
+
+GEMINI_GENERATION_CONFIG = {
+    "candidateCount": 1,
+    "temperature": GEMINI_TEMPERATURE,
+    # Thinking tokens count against maxOutputTokens, so spend the budget on the answer only
+    "thinkingConfig": { "thinkingBudget": 0 },
+    "responseMimeType": "application/json",
+    "responseSchema": {
+        "type": "ARRAY",
+        "items": {
+            "type": "OBJECT",
+            "properties": {
+                "Likelihood": { "type": "STRING" },
+                "Score": { "type": "NUMBER" },
+                "Reasoning": { "type": "STRING" }
+            },
+            "propertyOrdering": ["Likelihood", "Score", "Reasoning"]
+        }
+    }
+}
+
+# Cached evaluations are keyed by this fingerprint of the request template, so changing
+# the model, prompt or generation settings stops serving evaluations made under the old ones
+GEMINI_PROMPT_VERSION = hashlib.sha256(orjson.dumps(
+    [GEMINI_MODEL, GEMINI_PROMPT_PREAMBLE, GEMINI_GENERATION_CONFIG, GEMINI_OUTPUT_TOKENS_PER_LEAD],
+    option=orjson.OPT_SORT_KEYS,
+)).hexdigest()[:16]
+
+class GeminiThrottled(Exception):
+    """Raised when Gemini responds with 429 Too Many Requests."""
+
+    def __init__(self, response):
+        super().__init__("429 Too Many Requests")
+        self.response = response
+
+class GeminiServerError(Exception):
+    """Raised when Gemini responds with a 5xx server error."""
+
+    def __init__(self, response):
+        super().__init__(f"{response.status_code} Server Error")
+        self.response = response
+
+class GeminiBadResponse(Exception):
+    """Raised when a Gemini response is missing its content or is not valid JSON."""
+
+def gemini_wait(retry_state):
+    """Tenacity wait strategy that defers to the headers of the failed Gemini response."""
+    error = retry_state.outcome.exception()
+    return backoff_delay(getattr(error, 'response', None), retry_state.attempt_number)
+
+def gemini_wait_too_long(retry_state):
+    """Tenacity stop condition that gives up when Gemini asks for a wait beyond MAX_RETRY_AFTER_SECONDS."""
+    error = retry_state.outcome.exception()
+    return retry_after_too_long(getattr(error, 'response', None))
+
+@retry(
+    retry=retry_if_exception_type((httpx.TransportError, GeminiThrottled, GeminiServerError, GeminiBadResponse)),
+    wait=gemini_wait,
+    stop=stop_after_attempt(GEMINI_MAX_ATTEMPTS) | gemini_wait_too_long,
+    reraise=True,
+)
+def call_gemini(payload):
     """
-    Evaluates a batch of leads using the Gemini API.
-    Returns a list of leads with evaluation results.
+    Posts a payload to the Gemini API and returns the parsed JSON evaluations.
+    Rate limits, server errors, network failures and malformed responses are retried;
+    other client errors raise httpx.HTTPStatusError immediately.
     """
-    results = []
-    
-    prompt_parts = [
-        "You are an expert commercial real estate analyst. "
-        "Your task is to evaluate a list of businesses to determine their likelihood of being a viable tenant "
-        "for a commercial property. Your final response must be a JSON array of objects. "
-        "The objects should have the keys 'Likelihood' ('High', 'Medium', or 'Low'), 'Score' (1-100), and 'Reasoning'.\n\n",
-        f"The property for lease has suites available in the size range of {suite_sizes} in {property_city}.\n",
-        "Here are the businesses to evaluate:\n"
-    ]
+    apiUrl = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={API_KEY}"
+    try:
+        response = send_request(GEMINI_CLIENT, 'POST', apiUrl, GEMINI_RL, GEMINI_CONCURRENCY, content=orjson.dumps(payload))
+    except httpx.TransportError as e:
+        print(f"❌ Gemini request failed: {e}")
+        raise
+
+    if response.status_code == 429:
+        print("❌ Gemini API request failed: You have been rate-limited. Retrying with exponential backoff...")
+        raise GeminiThrottled(response)
+    if response.status_code >= 500:
+        print(f"❌ Gemini API request failed with a server error ({response.status_code}). Retrying...")
+        raise GeminiServerError(response)
+    response.raise_for_status()
+
+    try:
+        result = orjson.loads(response.content)
+        raw_json = result["candidates"][0]["content"]["parts"][0]["text"]
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        print(f"❌ Gemini response was missing candidates or parts.")
+        raise GeminiBadResponse(str(e)) from e
+    try:
+        return orjson.loads(raw_json)
+    except orjson.JSONDecodeError as e:
+        print(f"❌ Failed to parse JSON from Gemini response: {e}")
+        raise GeminiBadResponse(str(e)) from e
+
+def format_lead_for_prompt(lead):
+    """Returns the fields of a lead that Gemini sees, keeping at most 3 reviews."""
+    return {
+        'name': lead.name,
+        'type': lead.business_type,
+        'rating': lead.rating,
+        'review_count': lead.review_count,
+        'reviews': lead.reviews[:3],
+    }
 
-    for lead in batch:
-        prompt_parts.append(f"- Business: {lead['name']}, Type: {lead['business_type']}, Rating: {lead['rating']}, Review Count: {lead['review_count']}\n")
-        if lead['reviews']:
-            prompt_parts.append("  Recent Reviews:\n")
-            for review in lead['reviews']:
-                prompt_parts.append(f"  - \"{review}\"\n")
+def ai_evaluate_batch(batch, suite_sizes, property_city, top_n=TOP_LEADS_PER_BATCH):
+    """
+    Evaluates a batch of leads using the Gemini API.
+    Returns the top_n highest scoring leads with evaluation results.
+    """
+    # Nothing to evaluate, so don't spend a Gemini request on it
+    if not batch:
+        return []
     
-    prompt = "".join(prompt_parts)
+    # The businesses are sent as one compact JSON array rather than free text
+    businesses_json = orjson.dumps([format_lead_for_prompt(lead) for lead in batch]).decode()
+    prompt = GEMINI_PROMPT_PREAMBLE.format(suite_sizes=suite_sizes, city=property_city) + businesses_json + "\n"
 
     try:
-        chat_history = []
-        chat_history.append({ "role": "user", "parts": [{ "text": prompt }] })
+        # The shared generation config is copied shallowly, never mutated, to pin
+        # the response array to exactly one evaluation per business in the batch
+        # and cap the output at what one short evaluation per business needs
+        response_schema = dict(GEMINI_GENERATION_CONFIG["responseSchema"], minItems=len(batch), maxItems=len(batch))
+        generation_config = dict(
+            GEMINI_GENERATION_CONFIG,
+            responseSchema=response_schema,
+            maxOutputTokens=GEMINI_OUTPUT_TOKENS_PER_LEAD * len(batch),
+        )
         payload = {
-            "contents": chat_history,
-            "generationConfig": {
-                "responseMimeType": "application/json",
-                "responseSchema": {
-                    "type": "ARRAY",
-                    "items": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "Likelihood": { "type": "STRING" },
-                            "Score": { "type": "NUMBER" },
-                            "Reasoning": { "type": "STRING" }
-                        },
-                        "propertyOrdering": ["Likelihood", "Score", "Reasoning"]
-                    }
-                }
-            }
+            "contents": [{ "role": "user", "parts": [{ "text": prompt }] }],
+            "generationConfig": generation_config
         }
         
-        retry_count = 0
-        max_retries = 5
-        while retry_count < max_retries:
-            try:
-                apiUrl = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-preview-05-20:generateContent?key={API_KEY}"
-                response = requests.post(apiUrl, headers={'Content-Type': 'application/json'}, data=json.dumps(payload))
-                response.raise_for_status()
-                result = response.json()
-                
-                if result.get("candidates") and result["candidates"][0].get("content") and result["candidates"][0]["content"].get("parts"):
-                    raw_json = result["candidates"][0]["content"]["parts"][0]["text"]
-                    evals = json.loads(raw_json)
-                    break
-                else:
-                    print(f"❌ Gemini response was missing candidates or parts.")
-                    retry_count += 1
-                    time.sleep(2 ** retry_count)
-                    continue
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 429:
-                    print("❌ Gemini API request failed: You have been rate-limited. Retrying with exponential backoff...")
-                elif e.response.status_code >= 400 and e.response.status_code < 500:
-                    print(f"❌ Gemini API request failed with a client error ({e.response.status_code}). Check your API key or usage limits.")
-                    return []
-                else:
-                    print(f"❌ Gemini API request failed with a server error ({e.response.status_code}). Retrying...")
-                retry_count += 1
-                time.sleep(2 ** retry_count)
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Gemini request failed: {e}")
-                retry_count += 1
-                time.sleep(2 ** retry_count)
-            except json.JSONDecodeError as e:
-                print(f"❌ Failed to parse JSON from Gemini response: {e}")
-                retry_count += 1
-                time.sleep(2 ** retry_count)
-        else:
-            print("❌ Max retries exceeded. Skipping batch.")
-            return []
-
+        evals = call_gemini(payload)
+    except (GeminiThrottled, GeminiServerError, GeminiBadResponse, httpx.TransportError):
+        print("❌ Max retries exceeded. Skipping batch.")
+        return []
+    except httpx.HTTPStatusError as e:
+        print(f"❌ Gemini API request failed with a client error ({e.response.status_code}). Check your API key or usage limits.")
+        return []
     except Exception as e:
         print(f"❌ Gemini request failed unexpectedly: {e}")
         return []
 
+    # Results are matched to leads by position, so a response with the wrong number of
+    # them may be misaligned; use it for this run but never replay it from the cache
+    if len(evals) != len(batch):
+        print(f"⚠️ Gemini returned {len(evals)} evaluations for {len(batch)} businesses. Not caching this batch.")
+
     # Map the AI evaluation results back to the original leads
     evaluated_leads = []
     for idx, eval_row in enumerate(evals):
         if idx >= len(batch):
             break
         
-        lead = batch[idx].copy()
-        lead["Likelihood"] = eval_row.get("Likelihood", "Low")
-        lead["Score"] = eval_row.get("Score", 0)
-        lead["Reasoning"] = eval_row.get("Reasoning", "")
-        evaluated_leads.append(lead)
+        evaluated_leads.append(replace(
+            batch[idx],
+            likelihood=eval_row.get("Likelihood", "Low"),
+            score=eval_row.get("Score", 0),
+            reasoning=eval_row.get("Reasoning", ""),
+        ))
+
+    if len(evals) == len(batch):
+        cache_evaluations(evaluated_leads, suite_sizes, property_city)
+    return rank_evaluated_leads(evaluated_leads, top_n)
 
-    # Sort the results by score in descending order
-    sorted_leads = sorted(evaluated_leads, key=lambda x: x.get('Score', 0), reverse=True)
+def rank_evaluated_leads(evaluated_leads, top_n=TOP_LEADS_PER_BATCH):
+    """
+    Formats evaluated leads as ranked-lead rows: the top_n by score, in descending
+    order, keeping only High likelihood leads when FILTER_HIGH_ONLY is set.
+    """
+    # Keep only the top_n results, by score in descending order
+    sorted_leads = heapq.nlargest(top_n, evaluated_leads, key=lambda x: x.score)
 
+    run_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     final_output = []
     for lead in sorted_leads:
-        if FILTER_HIGH_ONLY and lead.get("Likelihood", "Low") != "High":
+        if FILTER_HIGH_ONLY and lead.likelihood != "High":
             continue
             
-        final_output.append([
-            lead.get("name"),
-            lead.get("address"),
-            lead.get("phone"),
-            lead.get("rating"),
-            lead.get("review_count"),
-            lead.get("business_type"),
-            lead.get("source"),
-            lead.get("Likelihood", "Low"),
-            datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            f"Score: {lead.get('Score', 0)} | {lead.get('Reasoning', '')}"
-        ])
+        final_output.append(format_lead_row(lead, run_timestamp))
 
     return final_output
 
+def format_lead_row(lead, run_timestamp):
+    """Formats an evaluated lead as a row of the ranked leads sheet."""
+    return [
+        lead.name,
+        lead.address,
+        lead.phone,
+        lead.rating,
+        lead.review_count,
+        lead.business_type,
+        lead.source,
+        lead.likelihood,
+        run_timestamp,
+        f"Score: {lead.score} | {lead.reasoning}"
+    ]
+
+def dedupe_leads(term_leads):
+    """
+    Merges businesses returned by several search terms, given each term's leads in
+    search term order. Each business is kept once, under the first term that found
+    it, and the other terms are appended to its business type in term order for
+    Gemini to consider. Returns each term's remaining leads.
+    """
+    seen_leads = {}  # business ID -> first lead found for it across all search terms
+    unique_term_leads = []
+    for leads in term_leads:
+        unique_leads = []
+        for lead in leads:
+            business_id = lead.business_id
+            first_lead = seen_leads.get(business_id) if business_id else None
+            if first_lead is None:
+                if business_id:
+                    seen_leads[business_id] = lead
+                unique_leads.append(lead)
+            else:
+                first_lead.business_type += f", {lead.business_type}"
+        unique_term_leads.append(unique_leads)
+    return unique_term_leads
+
+def prefilter_leads(leads):
+    """
+    Splits leads into clear accepts, clear rejects and ambiguous leads using the
+    deterministic rating rules, so only the ambiguous ones cost review fetches and
+    Gemini tokens. Returns (auto_high, auto_low, ambiguous).
+    """
+    auto_high, auto_low, ambiguous = [], [], []
+    for lead in leads:
+        if lead.rating >= AUTO_HIGH_MIN_RATING and lead.review_count >= AUTO_HIGH_MIN_REVIEWS:
+            auto_high.append(lead)
+        elif lead.rating < AUTO_LOW_MAX_RATING:
+            auto_low.append(lead)
+        else:
+            ambiguous.append(lead)
+    return auto_high, auto_low, ambiguous
+
+def auto_rated_rows(leads, likelihood):
+    """
+    Builds ranked-lead rows for leads classified by prefilter_leads, scoring them
+    from their star rating instead of asking Gemini.
+    """
+    rated_leads = [
+        replace(
+            lead,
+            likelihood=likelihood,
+            score=round(lead.rating * 20),
+            reasoning=f"Auto-rated {likelihood} from {lead.rating} stars across {lead.review_count} reviews.",
+        )
+        for lead in leads
+    ]
+    rated_leads.sort(key=lambda x: x.score, reverse=True)
+    run_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return [format_lead_row(lead, run_timestamp) for lead in rated_leads]
+
+# Sentinel that tells a pipeline worker its input queue is finished
+PIPELINE_DONE = object()
+
+def process_property(control_dict, row_index):
+    """
+    Runs the full search, review and evaluation pipeline for one active property
+    and writes its ranked leads, marking the control sheet row as completed.
+
+    All search terms are searched concurrently first. Once every search has finished,
+    businesses found by several terms are merged in search term order, so the result
+    does not depend on which search finished first. The review and evaluation stages
+    then run as a producer-consumer pipeline connected by bounded queues: the review
+    workers hand each search term's batches to the Gemini workers as soon as all of
+    its reviews are in, so Gemini can start on the first term while later terms'
+    reviews are still being fetched.
+    """
+    print(f"--- Processing Property: {control_dict['Property Name']} ---")
+    
+    property_city = control_dict["City"]
+    search_terms = [term.strip() for term in control_dict["Search Terms"].split(',')]
+    sheet_prefix = control_dict["Sheet Prefix"]
+    suite_sizes = control_dict["Suite Sizes"]
+    
+    search_workers = get_control_int(control_dict, "Search Workers", SEARCH_MAX_WORKERS)
+    batch_size = get_control_int(control_dict, "Batch Size", BATCH_SIZE)
+    top_n = get_control_int(control_dict, "Top Leads Per Batch", TOP_LEADS_PER_BATCH)
+    
+    reviews_q = queue.Queue(maxsize=REVIEW_MAX_WORKERS * 4)
+    eval_q = queue.Queue(maxsize=GEMINI_MAX_WORKERS * 2)
+    state_lock = threading.Lock()
+    pending_reviews = {}  # term index -> [leads, number of leads still waiting for reviews]
+    auto_rated_leads = {}  # term index -> (auto_high, auto_low) leads from the pre-filter
+    cached_leads = {}  # term index -> (lead, cached evaluation) pairs found in the local cache
+    evaluated_batches = {}  # (term index, batch index) -> evaluated rows
+
+    def queue_term_batches(term_index, leads):
+        term = search_terms[term_index]
+        num_batches = -(-len(leads) // batch_size)
+        print(f"Processing {num_batches} batch(es) for '{term}'...")
+        for batch_index, i in enumerate(range(0, len(leads), batch_size)):
+            eval_q.put((term_index, batch_index, leads[i:i + batch_size]))
+
+    def search_stage(term_index):
+        term = search_terms[term_index]
+        print(f"Searching Yelp for new leads with term: '{term}'...")
+        leads = yelp_search_leads(term, property_city, limit=50)
+        # The filtering based on review count and rating is now handled inside yelp_search_leads
+        if not leads:
+            print(f"No leads found for '{term}' that meet the filtering criteria.")
+        return leads
+
+    def queue_term_reviews(term_index, leads):
+        term = search_terms[term_index]
+        if not leads:
+            print(f"All leads for '{term}' were already found by other search terms.")
+            return
+        auto_high, auto_low, leads = prefilter_leads(leads)
+        auto_rated_leads[term_index] = (auto_high, auto_low)
+        if not leads:
+            print(f"All leads for '{term}' were rated by the pre-filter.")
+            return
+        # Leads already evaluated for these suite sizes and city skip the reviews and Gemini
+        cache_hits, cache_misses = [], []
+        for lead in leads:
+            cached = get_cached_evaluation(lead.business_id, suite_sizes, property_city) if lead.business_id else None
+            if cached:
+                cache_hits.append((lead, cached))
+            else:
+                cache_misses.append(lead)
+        if cache_hits:
+            cached_leads[term_index] = cache_hits
+        leads = cache_misses
+        if not leads:
+            print(f"All leads for '{term}' were found in the evaluation cache.")
+            return
+        with state_lock:
+            pending_reviews[term_index] = [leads, len(leads)]
+        for lead in leads:
+            reviews_q.put((term_index, lead))
+
+    def review_stage():
+        while True:
+            item = reviews_q.get()
+            if item is PIPELINE_DONE:
+                return
+            term_index, lead = item
+            try:
+                # Fetch reviews only for leads that pass the initial filter
+                if lead.business_id:
+                    lead.reviews = get_yelp_reviews(lead.business_id)
+            except Exception as e:
+                print(f"❌ Failed to fetch reviews for '{lead.name}': {e}")
+            with state_lock:
+                pending = pending_reviews[term_index]
+                pending[1] -= 1
+                term_ready = pending[1] == 0
+            if term_ready:
+                queue_term_batches(term_index, pending[0])
+
+    def evaluation_stage():
+        while True:
+            item = eval_q.get()
+            if item is PIPELINE_DONE:
+                return
+            term_index, batch_index, batch = item
+            try:
+                evaluated_batch = ai_evaluate_batch(batch, suite_sizes, property_city, top_n)
+            except Exception as e:
+                print(f"❌ Failed to evaluate a batch for '{search_terms[term_index]}': {e}")
+                evaluated_batch = []
+            with state_lock:
+                evaluated_batches[(term_index, batch_index)] = evaluated_batch
+
+    review_pool = ThreadPoolExecutor(max_workers=REVIEW_MAX_WORKERS)
+    eval_pool = ThreadPoolExecutor(max_workers=GEMINI_MAX_WORKERS)
+    for _ in range(REVIEW_MAX_WORKERS):
+        review_pool.submit(review_stage)
+    for _ in range(GEMINI_MAX_WORKERS):
+        eval_pool.submit(evaluation_stage)
+
+    # Search all terms concurrently and merge their leads in term order before any
+    # of them are reviewed, then shut each stage down once its producers are done
+    try:
+        with ThreadPoolExecutor(max_workers=min(search_workers, len(search_terms))) as search_pool:
+            term_leads = list(search_pool.map(search_stage, range(len(search_terms))))
+        for term_index, leads in enumerate(dedupe_leads(term_leads)):
+            if term_leads[term_index]:
+                queue_term_reviews(term_index, leads)
+    finally:
+        for _ in range(REVIEW_MAX_WORKERS):
+            reviews_q.put(PIPELINE_DONE)
+        review_pool.shutdown(wait=True)
+        for _ in range(GEMINI_MAX_WORKERS):
+            eval_q.put(PIPELINE_DONE)
+        eval_pool.shutdown(wait=True)
+
+    # Rule-rated rows, then cached evaluations, go ahead of each term's Gemini batches
+    for term_index, (auto_high, auto_low) in auto_rated_leads.items():
+        auto_rows = auto_rated_rows(auto_high, "High")
+        if not FILTER_HIGH_ONLY:
+            auto_rows += auto_rated_rows(auto_low, "Low")
+        evaluated_batches[(term_index, -2)] = auto_rows
+    for term_index, cache_hits in cached_leads.items():
+        leads = [replace(lead, **cached) for lead, cached in cache_hits]
+        evaluated_batches[(term_index, -1)] = rank_evaluated_leads(leads, top_n)
+
+    # Reassemble the batches in search term order, keeping each batch's score ordering
+    all_evaluated_leads = []
+    for key in sorted(evaluated_batches):
+        all_evaluated_leads.extend(evaluated_batches[key])
+
+    if not all_evaluated_leads:
+        print(f"No leads passed the filters and evaluation for '{control_dict['Property Name']}'.")
+        return
+        
+    output_sheet_name = f"{sheet_prefix}_RankedLeads"
+    
+    output_header = ["Business Name", "Address", "Phone", "Rating", "Review Count", "Business Type", "Source"]
+    output_header += ["Likelihood", "Run Timestamp", "Reasoning"]
+    
+    # The ranked leads and the control sheet status are written in one request
+    if write_to_sheet(output_sheet_name, output_header, all_evaluated_leads, [control_status_update(row_index)]):
+        print(f"✅ Successfully updated status for property with prefix '{sheet_prefix}'.")
+
 def run_scan():
     """
     This function orchestrates the entire workflow: reading from the control sheet,
     searching for leads, fetching reviews, and writing the results to new sheets.
+    Active properties are processed concurrently.
     """
     print("🚀 Starting Tenant Hunter program...")
     
@@ -366,68 +1077,29 @@ def run_scan():
     control_header = control_data[0]
     control_rows = control_data[1:]
 
-    for control_row in control_rows:
+    active_properties = []
+    # Row 1 of the control sheet is the header, so property rows start at row 2
+    for row_index, control_row in enumerate(control_rows, start=2):
         control_dict = dict(zip(control_header, control_row))
         
         if (control_dict.get("Status (paused/active)", "").strip().lower() != "active"):
             print(f"Skipping '{control_dict.get('Property Name', 'N/A')}' - not active.")
             continue
-            
-        print(f"--- Processing Property: {control_dict['Property Name']} ---")
         
-        property_city = control_dict["City"]
-        search_terms = [term.strip() for term in control_dict["Search Terms"].split(',')]
-        sheet_prefix = control_dict["Sheet Prefix"]
-        suite_sizes = control_dict["Suite Sizes"]
-        
-        all_evaluated_leads = []
-        
-        # New loop to process and sort leads per search term
-        for term in search_terms:
-            print(f"Searching Yelp for new leads with term: '{term}'...")
-            leads = yelp_search_leads(term, property_city, limit=50)
-            
-            # The filtering based on review count and rating is now handled inside yelp_search_leads
-            
-            if not leads:
-                print(f"No leads found for '{term}' that meet the filtering criteria.")
-                continue
-                
-            # Fetch reviews only for leads that pass the initial filter
-            for lead in leads:
-                business_id = lead.get('business_id')
-                if business_id:
-                    reviews = get_yelp_reviews(business_id)
-                    lead['reviews'] = reviews
-            
-            # Evaluate and sort this term's batch of leads
-            evaluated_term_leads = []
-            num_batches = math.ceil(len(leads) / BATCH_SIZE)
-            if num_batches > 0:
-              for i in range(0, len(leads), BATCH_SIZE):
-                  batch = leads[i:i + BATCH_SIZE]
-                  print(f"Processing batch {i//BATCH_SIZE + 1} of {num_batches} for '{term}'...")
-
-                  evaluated_batch = ai_evaluate_batch(batch, suite_sizes, property_city)
-                  evaluated_term_leads.extend(evaluated_batch)
-            else:
-              print(f"No leads to process for '{term}'.")
-            
-            # Add the sorted, evaluated leads for this term to the main list
-            all_evaluated_leads.extend(evaluated_term_leads)
+        active_properties.append((control_dict, row_index))
 
-        if not all_evaluated_leads:
-            print(f"No leads passed the filters and evaluation for '{control_dict['Property Name']}'.")
-            continue
-            
-        output_sheet_name = f"{sheet_prefix}_RankedLeads"
-        
-        output_header = ["Business Name", "Address", "Phone", "Rating", "Review Count", "Business Type", "Source"]
-        output_header += ["Likelihood", "Run Timestamp", "Reasoning"]
-        
-        write_to_sheet(output_sheet_name, output_header, all_evaluated_leads)
-        
-        update_control_sheet_status(sheet_prefix)
+    if active_properties:
+        with ThreadPoolExecutor(max_workers=min(PROPERTY_MAX_WORKERS, len(active_properties))) as executor:
+            futures = {
+                executor.submit(process_property, control_dict, row_index): control_dict
+                for control_dict, row_index in active_properties
+            }
+            # A failure in one property is reported without stopping the others
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"❌ Failed to process '{futures[future].get('Property Name', 'N/A')}': {e}")
 
     print("🎉 Program finished successfully.")
 